@@ -13,7 +13,7 @@ pub mod worker;
 
 use openai_network_types::Roles;
 use py_worker::{PythonWorker, drop_all, read_all_cache, read_model, write_model, write_to_cache};
-use pyo3::prelude::*;
+use pyo3::{prelude::*, types::PyDict};
 use types::{
     ApiType,
     AssistantSettings,
@@ -36,6 +36,20 @@ fn rust_helper(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<ApiType>()?;
     m.add_class::<ReasonEffort>()?;
 
+    // Built once at import, so callers can map settings strings without an extra FFI call per lookup.
+    // Exposed through a read-only proxy, as the lookup is shared by the whole process.
+    let prompt_modes = PyDict::new(m.py());
+    for mode in [PromptMode::View, PromptMode::Phantom] {
+        prompt_modes.set_item(mode.to_string(), mode)?;
+    }
+    prompt_modes.set_item("panel", PromptMode::View)?; // deprecated alias, same as in `AssistantSettings`
+    let prompt_modes = m
+        .py()
+        .import("types")?
+        .getattr("MappingProxyType")?
+        .call1((prompt_modes,))?;
+    m.add("PROMPT_MODES", prompt_modes)?;
+
     m.add_function(wrap_pyfunction!(read_all_cache, m)?)?;
     m.add_function(wrap_pyfunction!(write_to_cache, m)?)?;
     m.add_function(wrap_pyfunction!(drop_all, m)?)?;
@@ -1,8 +1,9 @@
 use std::{
-    sync::{Arc, atomic::Ordering},
+    sync::{Arc, Mutex, atomic::Ordering},
     thread,
 };
 
+use once_cell::sync::Lazy;
 use pyo3::prelude::*;
 use tokio::runtime::Runtime;
 
@@ -12,6 +13,9 @@ use crate::{
     worker::OpenAIWorker,
 };
 
+/// Shared by every `Worker` so that runs don't pay for a fresh thread pool each time.
+static RUNTIME: Lazy<Runtime> = Lazy::new(|| Runtime::new().expect("Failed to create runtime"));
+
 #[pyclass(name = "Worker")]
 #[derive(Clone, Debug)]
 pub struct PythonWorker {
@@ -85,10 +89,18 @@ impl PythonWorker {
         error_handler: PyObject,
         function_handler: PyObject,
     ) -> PyResult<()> {
-        let rt = Runtime::new().expect("Failed to create runtime");
+        // Both flags are settled before the thread is spawned: `is_alive` never misses a run being spawned,
+        // and a stale cancel is dropped here while one issued right after this call still lands.
+        self.worker
+            .cancel_signal
+            .store(false, Ordering::SeqCst);
+        self.worker
+            .is_alive
+            .store(true, Ordering::SeqCst);
+
         let worker_clone = self.worker.clone();
         thread::spawn(move || {
-            rt.block_on(async move {
+            RUNTIME.block_on(async move {
                 worker_clone
                     .run(
                         view_id,
@@ -106,7 +118,7 @@ impl PythonWorker {
         Ok(())
     }
 
-    pub fn cancel(&mut self) { self.worker.cancel() }
+    pub fn cancel(&self) { self.worker.cancel() }
 
     pub fn is_alive(&self) -> bool {
         self.worker
@@ -125,24 +137,93 @@ impl PythonWorker {
         error_handler: PyObject,
         function_handler: PyObject,
     ) -> PyResult<()> {
-        let rt = Runtime::new().expect("Failed to create runtime");
-        let worker_clone = self.worker.clone();
-        let _ = rt.block_on(async move {
-            worker_clone
-                .run(
-                    view_id,
-                    contents,
-                    prompt_mode,
-                    assistant_settings,
-                    TextHandler::new(handler).func,
-                    TextHandler::new(error_handler).func,
-                    FunctionHandler::new(function_handler).func,
-                )
-                .await
-        });
+        let _ = self.block_on_run(
+            view_id,
+            prompt_mode,
+            contents,
+            assistant_settings,
+            TextHandler::new(handler).func,
+            TextHandler::new(error_handler).func,
+            FunctionHandler::new(function_handler).func,
+        );
 
         Ok(())
     }
+
+    /// Same as `run_sync`, but the streamed text is gathered on the Rust side and returned once the run
+    /// is over, instead of calling back into Python for every chunk. The GIL is released meanwhile,
+    /// so other threads can still `cancel` the run or check `is_alive`.
+    #[allow(clippy::too_many_arguments)]
+    fn run_collect(
+        &self,
+        py: Python<'_>,
+        view_id: usize,
+        prompt_mode: PromptMode,
+        contents: Vec<SublimeInputContent>,
+        assistant_settings: AssistantSettings,
+        error_handler: PyObject,
+        function_handler: PyObject,
+    ) -> PyResult<Vec<String>> {
+        let collected = Arc::new(Mutex::new(Vec::new()));
+        let collected_clone = Arc::clone(&collected);
+        let handler: Arc<dyn Fn(String) + Send + Sync + 'static> = Arc::new(move |s: String| {
+            // A poisoned lock is reported once the run is over, see below.
+            if let Ok(mut collected) = collected_clone.lock() {
+                collected.push(s);
+            }
+        });
+        let error_handler = TextHandler::new(error_handler).func;
+        let function_handler = FunctionHandler::new(function_handler).func;
+
+        py.allow_threads(|| {
+            let _ = self.block_on_run(
+                view_id,
+                prompt_mode,
+                contents,
+                assistant_settings,
+                handler,
+                error_handler,
+                function_handler,
+            );
+        });
+
+        let output = collected
+            .lock()
+            .map(|mut collected| std::mem::take(&mut *collected))
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyRuntimeError, _>(format!("{}", e)))?;
+
+        Ok(output)
+    }
+}
+
+impl PythonWorker {
+    /// Drives a single run to completion on the shared runtime, blocking the calling thread.
+    /// A cancel left over from an idle worker is dropped first, one issued during the run still lands.
+    #[allow(clippy::too_many_arguments)]
+    fn block_on_run(
+        &self,
+        view_id: usize,
+        prompt_mode: PromptMode,
+        contents: Vec<SublimeInputContent>,
+        assistant_settings: AssistantSettings,
+        handler: Arc<dyn Fn(String) + Send + Sync + 'static>,
+        error_handler: Arc<dyn Fn(String) + Send + Sync + 'static>,
+        function_handler: Arc<dyn Fn((String, String)) -> String + Send + Sync + 'static>,
+    ) -> anyhow::Result<()> {
+        self.worker
+            .cancel_signal
+            .store(false, Ordering::SeqCst);
+
+        RUNTIME.block_on(self.worker.run(
+            view_id,
+            contents,
+            prompt_mode,
+            assistant_settings,
+            handler,
+            error_handler,
+            function_handler,
+        ))
+    }
 }
 
 #[pyfunction]
@@ -1,6 +1,16 @@
 use std::{collections::HashMap, str::FromStr};
 
-use pyo3::{FromPyObject, pyclass, pymethods};
+use pyo3::{
+    Bound,
+    FromPyObject,
+    PyErr,
+    PyResult,
+    exceptions::PyValueError,
+    pybacked::PyBackedBytes,
+    pyclass,
+    pymethods,
+    types::{PyAnyMethods, PyDict},
+};
 use regex::Regex;
 use serde::{Deserialize, Serialize};
 use strum_macros::{Display, EnumString};
@@ -154,7 +164,7 @@ pub enum ReasonEffort {
 }
 
 #[derive(Debug, Clone, Deserialize, Serialize)]
-#[pyclass]
+#[pyclass(frozen)]
 pub struct SublimeOutputContent {
     #[pyo3(get)]
     pub content: Option<String>,
@@ -188,7 +198,7 @@ impl From<&CacheEntry> for SublimeOutputContent {
 }
 
 #[derive(Debug, Clone, Deserialize, Serialize)]
-#[pyclass]
+#[pyclass(frozen)]
 pub struct SublimeInputContent {
     #[pyo3(get)]
     pub content: Option<String>,
@@ -224,6 +234,36 @@ impl SublimeInputContent {
         }
     }
 
+    /// Builds a batch of inputs from parallel lists in a single call.
+    ///
+    /// `paths` and `scopes` may be omitted, otherwise every list must be as long as `kinds`.
+    #[staticmethod]
+    #[pyo3(signature = (kinds, contents, paths=None, scopes=None))]
+    pub fn from_arrays(
+        kinds: Vec<InputKind>,
+        contents: Vec<Option<String>>,
+        paths: Option<Vec<Option<String>>>,
+        scopes: Option<Vec<Option<String>>>,
+    ) -> PyResult<Vec<Self>> {
+        let len = kinds.len();
+        let paths = paths.unwrap_or_else(|| vec![None; len]);
+        let scopes = scopes.unwrap_or_else(|| vec![None; len]);
+
+        if contents.len() != len || paths.len() != len || scopes.len() != len {
+            return Err(PyErr::new::<PyValueError, _>(
+                "`kinds`, `contents`, `paths` and `scopes` must have the same length",
+            ));
+        }
+
+        Ok(kinds
+            .into_iter()
+            .zip(contents)
+            .zip(paths)
+            .zip(scopes)
+            .map(|(((input_kind, content), path), scope)| Self::new(input_kind, content, path, scope))
+            .collect())
+    }
+
     pub(crate) fn combined_content(&self) -> String {
         match (&self.path, &self.content) {
             (Some(path), Some(content)) => format!("Path: `{}`\n{}", path, content),
@@ -327,7 +367,8 @@ pub enum ApiType {
     Google,
 }
 
-#[derive(FromPyObject, Clone)]
+#[derive(FromPyObject, Deserialize, Clone)]
+#[serde(untagged)]
 pub enum RustyEnum {
     Bool(bool),
     Int(usize),
@@ -335,15 +376,60 @@ pub enum RustyEnum {
     String(String),
 }
 
+/// What `AssistantSettings(...)` accepts from Python: a settings dict or the same object as JSON text,
+/// either `str` or `bytes`/`bytearray`.
+#[derive(FromPyObject)]
+pub enum SettingsSource {
+    Dict(HashMap<String, RustyEnum>),
+    Json(String),
+    JsonBytes(PyBackedBytes),
+}
+
 #[pymethods]
 impl AssistantSettings {
     #[new]
     #[pyo3(signature = (dict))]
+    fn py_new(dict: SettingsSource) -> PyResult<Self> {
+        match dict {
+            SettingsSource::Dict(dict) => Ok(Self::new(dict)),
+            SettingsSource::Json(json) => Self::from_json(json.as_bytes()),
+            SettingsSource::JsonBytes(json) => Self::from_json(&json),
+        }
+    }
+
+    pub fn deep_copy(&self) -> Self {
+        self.clone() // This will use the derived Clone implementation
+    }
+
+    /// Returns a copy with the given keys patched, e.g. `settings.with_overrides(stream=False)`.
+    ///
+    /// Keys are the same as the ones accepted by the constructor dict.
+    #[pyo3(signature = (**overrides))]
+    pub fn with_overrides(&self, overrides: Option<&Bound<'_, PyDict>>) -> PyResult<Self> {
+        let mut settings = self.clone();
+        if let Some(overrides) = overrides {
+            settings.apply_dict(&overrides.extract::<HashMap<String, RustyEnum>>()?);
+        }
+        Ok(settings)
+    }
+}
+
+impl AssistantSettings {
     pub fn new(dict: HashMap<String, RustyEnum>) -> Self {
         let mut default = AssistantSettings::default();
+        default.apply_dict(&dict);
+        default
+    }
+
+    fn from_json(json: &[u8]) -> PyResult<Self> {
+        serde_json::from_slice::<HashMap<String, RustyEnum>>(json)
+            .map(Self::new)
+            .map_err(|e| PyErr::new::<PyValueError, _>(format!("Invalid settings JSON: {}", e)))
+    }
 
+    fn apply_dict(&mut self, dict: &HashMap<String, RustyEnum>) {
         if let Some(RustyEnum::String(value)) = dict.get("name") {
-            default.name = value.clone();
+            self.name = value.clone();
         }
 
         if let Some(RustyEnum::String(value)) = dict
@@ -351,83 +437,77 @@ impl AssistantSettings {
             .or(dict.get("prompt_mode"))
         {
             let deprecated_value = if value == "panel" { "view" } else { value };
-            default.output_mode = PromptMode::from_str(deprecated_value).unwrap_or(PromptMode::Phantom);
+            self.output_mode = PromptMode::from_str(deprecated_value).unwrap_or(PromptMode::Phantom);
         }
 
         if let Some(RustyEnum::String(value)) = dict.get("token") {
-            default.token = Some(value.clone());
+            self.token = Some(value.clone());
         }
         if let Some(RustyEnum::String(value)) = dict.get("chat_model") {
-            default.chat_model = value.clone();
+            self.chat_model = value.clone();
         }
 
         if let Some(RustyEnum::String(value)) = dict.get("url") {
-            default.url = value.clone();
+            self.url = value.clone();
         }
 
         if let Some(RustyEnum::String(value)) = dict.get("assistant_role") {
-            default.assistant_role = Some(value.clone());
+            self.assistant_role = Some(value.clone());
         }
 
         if let Some(RustyEnum::String(value)) = dict.get("reasoning_effort") {
-            default.reasoning_effort = ReasonEffort::from_str(value).ok();
+            self.reasoning_effort = ReasonEffort::from_str(value).ok();
         }
 
         if let Some(RustyEnum::Float(value)) = dict.get("temperature") {
-            default.temperature = Some(*value);
+            self.temperature = Some(*value);
         }
 
         if let Some(RustyEnum::Int(value)) = dict.get("max_tokens") {
             if !dict.contains_key("max_completion_tokens") {
-                default.max_tokens = Some(*value);
+                self.max_tokens = Some(*value);
             }
         }
 
         if let Some(RustyEnum::Int(value)) = dict.get("max_completion_tokens") {
-            default.max_completion_tokens = Some(*value);
+            self.max_completion_tokens = Some(*value);
         }
 
         if let Some(RustyEnum::Int(value)) = dict.get("timeout") {
-            default.timeout = *value;
+            self.timeout = *value;
         }
 
         if let Some(RustyEnum::Float(value)) = dict.get("top_p") {
-            default.top_p = Some(*value);
+            self.top_p = Some(*value);
         }
 
         if let Some(RustyEnum::Float(value)) = dict.get("frequency_penalty") {
-            default.frequency_penalty = Some(*value);
+            self.frequency_penalty = Some(*value);
         }
 
         if let Some(RustyEnum::Float(value)) = dict.get("presence_penalty") {
-            default.presence_penalty = Some(*value);
+            self.presence_penalty = Some(*value);
         }
 
         if let Some(RustyEnum::Bool(value)) = dict.get("tools") {
-            default.tools = Some(*value);
+            self.tools = Some(*value);
         }
 
         if let Some(RustyEnum::Bool(value)) = dict.get("parallel_tool_calls") {
-            default.parallel_tool_calls = Some(*value);
+            self.parallel_tool_calls = Some(*value);
         }
 
         if let Some(RustyEnum::Bool(value)) = dict.get("stream") {
-            default.stream = *value;
+            self.stream = *value;
         }
 
         if let Some(RustyEnum::Bool(value)) = dict.get("advertisement") {
-            default.advertisement = *value;
+            self.advertisement = *value;
         }
 
         if let Some(RustyEnum::String(value)) = dict.get("api_type") {
-            default.api_type = ApiType::from_str(value).unwrap_or(ApiType::PlainText);
+            self.api_type = ApiType::from_str(value).unwrap_or(ApiType::PlainText);
         }
-
-        default
-    }
-
-    pub fn deep_copy(&self) -> Self {
-        self.clone() // This will use the derived Clone implementation
     }
 }
 
@@ -506,4 +586,47 @@ mod tests {
         )]));
         assert_eq!(settings.api_type, ApiType::Google);
     }
+
+    #[test]
+    fn test_apply_dict_patches_only_given_keys() {
+        let mut settings = AssistantSettings::new(HashMap::from([
+            (
+                "name".to_string(),
+                RustyEnum::String("TEST".to_string()),
+            ),
+            (
+                "stream".to_string(),
+                RustyEnum::Bool(true),
+            ),
+        ]));
+
+        settings.apply_dict(&HashMap::from([
+            (
+                "stream".to_string(),
+                RustyEnum::Bool(false),
+            ),
+            (
+                "tools".to_string(),
+                RustyEnum::Bool(true),
+            ),
+        ]));
+
+        assert_eq!(settings.name, "TEST");
+        assert!(!settings.stream);
+        assert_eq!(settings.tools, Some(true));
+    }
+
+    #[test]
+    fn test_from_json_matches_dict_parsing() {
+        let settings = AssistantSettings::from_json(
+            br#"{"name": "TEST", "stream": false, "timeout": 20, "temperature": 0.7, "api_type": "google"}"#,
+        )
+        .unwrap();
+
+        assert_eq!(settings.name, "TEST");
+        assert!(!settings.stream);
+        assert_eq!(settings.timeout, 20);
+        assert_eq!(settings.temperature, Some(0.7));
+        assert_eq!(settings.api_type, ApiType::Google);
+    }
 }
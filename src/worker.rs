@@ -30,7 +30,7 @@ pub struct OpenAIWorker {
     pub(crate) cacher_path: String,
 
     cacher: Arc<Mutex<Cacher>>,
-    cancel_signal: Arc<AtomicBool>,
+    pub(crate) cancel_signal: Arc<AtomicBool>,
     pub(crate) is_alive: Arc<AtomicBool>,
 }
 
@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# Importing the extension here loads the `.so` (and registers its classes) during collection,
+# once per xdist process, instead of inside the first test.
+from llm_runner import AssistantSettings, Worker  # type: ignore
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+WorkerKey = Tuple[int, str, Optional[str]]
+
+
+class _OpenAIMockHandler(BaseHTTPRequestHandler):
+    """Replays recorded `/chat/completions` responses picked by the shape of the request.
+
+    A `?delay=<seconds>` query paces SSE frames, so a client can cancel mid-stream, and a
+    `?fixture=<name>` query replaces the streamed fixture, e.g. with the 60-frame `chat_completion_long.sse`.
+    """
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        query = parse_qs(urlsplit(self.path).query)
+        delay = float(query.get('delay', ['0'])[0])
+        fixture = query.get('fixture', [None])[0]
+
+        if not payload.get('stream'):
+            self._reply('application/json', 'chat_completion.json')
+        elif payload.get('tools') and payload['messages'][-1].get('role') != 'tool':
+            self._reply('text/event-stream', fixture or 'chat_completion_tool_call.sse', delay)
+        else:
+            self._reply('text/event-stream', fixture or 'chat_completion.sse', delay)
+
+    def _reply(self, content_type: str, fixture: str, delay: float = 0) -> None:
+        body = (FIXTURES / fixture).read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+
+        if not delay:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        # No length: the body ends when the connection closes after the last frame.
+        self.end_headers()
+        try:
+            for frame in body.split(b'\n\n'):
+                if frame.strip():
+                    self.wfile.write(frame + b'\n\n')
+                    self.wfile.flush()
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client has hung up, e.g. after a cancel
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture(scope='session')
+def openai_mock_url() -> Iterator[str]:
+    """Local stand-in for `https://api.openai.com/v1/chat/completions`."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OpenAIMockHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f'http://127.0.0.1:{server.server_port}/v1/chat/completions'
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='session')
+def cache_path(tmp_path_factory: pytest.TempPathFactory) -> str:
+    # Session temp dirs are unique per pytest-xdist process, so runs don't race on `chat_history.jl`.
+    return str(tmp_path_factory.mktemp('history'))
+
+
+@pytest.fixture(scope='session')
+def _worker_cache() -> Dict[WorkerKey, Worker]:
+    return {}
+
+
+@pytest.fixture(scope='session')
+def worker_factory(_worker_cache: Dict[WorkerKey, Worker]) -> Callable[..., Worker]:
+    """Hands out one `Worker` per `(window_id, path, proxy)` for the whole session."""
+
+    def factory(window_id: int, path: str, proxy: Optional[str] = None) -> Worker:
+        key = (window_id, path, proxy)
+        if key not in _worker_cache:
+            _worker_cache[key] = Worker(window_id=window_id, path=path, proxy=proxy)
+        return _worker_cache[key]
+
+    return factory
+
+
+@pytest.fixture(autouse=True)
+def _drain_workers(_worker_cache: Dict[WorkerKey, Worker], cache_path: str) -> Iterator[None]:
+    """Settles every cached worker after a test, then clears the shared chat history."""
+    yield
+
+    for worker in _worker_cache.values():
+        worker.cancel()
+
+    deadline = time.monotonic() + 10
+    for worker in _worker_cache.values():
+        while worker.is_alive():
+            if time.monotonic() > deadline:
+                pytest.fail('Worker run did not stop within 10s of being cancelled')
+            time.sleep(0.01)
+
+    try:
+        os.truncate(os.path.join(cache_path, 'chat_history.jl'), 0)
+    except FileNotFoundError:
+        pass
+
+
+@pytest.fixture(scope='session')
+def echo_settings(openai_mock_url: str) -> AssistantSettings:
+    """Shared echo-bot settings; tests derive per-case variants with `with_overrides`."""
+    return AssistantSettings(
+        {
+            'name': 'TEST',
+            'output_mode': 'phantom',
+            'chat_model': 'gpt-4o-mini',
+            'assistant_role': "You're echo bot. You'r just responsing with what you've been asked for",
+            'url': openai_mock_url,
+            'token': 'dummy-token',
+            'stream': True,
+            'advertisement': False,
+        }
+    )
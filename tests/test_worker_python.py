@@ -1,33 +1,51 @@
 import asyncio
+import json
 import os
+import threading
 import time
 from typing import List
 
 import pytest
 from llm_runner import (
+    PROMPT_MODES,  # type: ignore
     AssistantSettings,  # type: ignore
     InputKind,  # type: ignore
     PromptMode,  # type: ignore
     SublimeInputContent,  # type: ignore
-    Worker,  # type: ignore
     ReasonEffort,  # type: ignore
     ApiType,  # type: ignore
 )
 
 
-PATH = '/tmp/'
+VERBOSE = bool(os.environ.get('LLM_RUNNER_TEST_VERBOSE'))
 
 
 def function_handeler(name: str, args: str) -> str:
     return 'Success'
 
 
-def test_python_worker_initialization():
-    worker = Worker(window_id=100, path=PATH)
+def test_python_worker_initialization(worker_factory, cache_path):
+    worker = worker_factory(100, cache_path)
 
     assert worker.window_id == 100
 
 
+def test_sublime_input_content_from_arrays():
+    contents = SublimeInputContent.from_arrays(
+        [InputKind.ViewSelection, InputKind.Command],
+        ['first', 'second'],
+        paths=['/tmp/some.txt', None],
+    )
+
+    assert [c.input_kind for c in contents] == [InputKind.ViewSelection, InputKind.Command]
+    assert [c.content for c in contents] == ['first', 'second']
+    assert [c.path for c in contents] == ['/tmp/some.txt', None]
+    assert [c.scope for c in contents] == [None, None]
+
+    with pytest.raises(ValueError):
+        SublimeInputContent.from_arrays([InputKind.Command], ['first', 'second'])
+
+
 def test_assistant_settings():
     dicttt = {
         'name': 'Example',
@@ -98,6 +116,38 @@ def test_assistant_settings_real():
     assert settings.api_type == ApiType.OpenAi
 
 
+def test_assistant_settings_from_json():
+    dicttt = {
+        'name': 'o3-mini low',
+        'chat_model': 'o3-mini',
+        'reasoning_effort': 'low',
+        'stream': False,
+        'timeout': 20,
+        'temperature': 0.7,
+        'api_type': 'open_ai',
+    }
+    settings_bytes = json.dumps(dicttt).encode()
+
+    for settings in (
+        AssistantSettings(settings_bytes),
+        AssistantSettings(bytearray(settings_bytes)),
+        AssistantSettings(settings_bytes.decode()),
+    ):
+        assert settings.name == 'o3-mini low'
+        assert settings.chat_model == 'o3-mini'
+        assert settings.reasoning_effort == ReasonEffort.Low
+        assert not settings.stream
+        assert settings.timeout == 20
+        assert settings.temperature == 0.7
+        assert settings.api_type == ApiType.OpenAi
+
+    with pytest.raises(ValueError):
+        AssistantSettings(b'{not json')
+
+    with pytest.raises(TypeError):
+        AssistantSettings(list(settings_bytes))
+
+
 def test_assistant_settings_supports_new_provider_types():
     anthropic = AssistantSettings(
         {
@@ -146,150 +196,175 @@ def test_assistant_settings_default_provider_is_preserved():
     assert settings.url == 'https://api.openai.com/v1/chat/completions'
 
 
-def test_python_worker_plain_run():
-    proxy = os.environ.get('PROXY')
-    if proxy is not None:
-        worker = Worker(window_id=101, path=PATH, proxy=proxy)
-    else:
-        worker = Worker(window_id=101, path=PATH)
-
-    some_list: List[str] = []
-    error_list: List[str] = []
+def test_prompt_modes_lookup():
+    assert PROMPT_MODES['view'] == PromptMode.View
+    assert PROMPT_MODES['phantom'] == PromptMode.Phantom
+    assert PROMPT_MODES['panel'] == PromptMode.View
+    assert PROMPT_MODES.get('unknown') is None
+    assert set(PROMPT_MODES) == {'view', 'phantom', 'panel'}
 
-    def my_handler_1(data: str) -> None:
-        some_list.append(data)
-        print(f'Received data: {data}')
+    with pytest.raises(TypeError):
+        PROMPT_MODES['view'] = PromptMode.Phantom  # type: ignore
 
-    def error_handler_1(data: str) -> None:
-        error_list.append(data)
-        print(f'Received data: {data}')
 
-    contents = SublimeInputContent(
-        InputKind.ViewSelection, 'This is the test request, provide me 3 words response'
-    )
+def test_assistant_settings_with_overrides(echo_settings):
+    settings = echo_settings.with_overrides(stream=False, tools=True, timeout=20)
 
-    dicttt = {
-        'name': 'TEST',
-        'output_mode': 'phantom',
-        'chat_model': 'gpt-4o-mini',
-        'assistant_role': "You're echo bot. You'r just responsing with what you've been asked for",
-        'url': 'https://api.openai.com/v1/chat/completions',
-        'token': os.getenv('OPENAI_API_KEY'),
-        'stream': False,
-        'advertisement': False,
-    }
-
-    settings = AssistantSettings(dicttt)
-
-    worker.run(1, PromptMode.View, [contents], settings, my_handler_1, error_handler_1, function_handeler)
-
-    time.sleep(2)
-
-    assert some_list
-
-
-def test_python_worker_sse_run():
-    proxy = os.environ.get('PROXY')
-    if proxy is not None:
-        worker = Worker(window_id=101, path=PATH, proxy=proxy)
-    else:
-        worker = Worker(window_id=101, path=PATH)
+    assert not settings.stream
+    assert settings.tools
+    assert settings.timeout == 20
+    assert settings.name == echo_settings.name
+    assert settings.url == echo_settings.url
+    assert echo_settings.stream  # the shared fixture stays untouched
+
+
+@pytest.mark.parametrize(
+    'run_method, stream, tools, prompt, expected',
+    [
+        pytest.param('run', False, False, 'provide me 3 words response', 'Three words response', id='plain'),
+        pytest.param(
+            'run_sync', True, False, 'provide me 30 words response', 'This is the test response.', id='sse'
+        ),
+        pytest.param(
+            'run',
+            True,
+            True,
+            'call the read_region_content function on /tmp/some.txt',
+            '- read_region_content\nThis is the test response.',
+            id='sse_function',
+        ),
+    ],
+)
+def test_python_worker_run(
+    worker_factory, cache_path, echo_settings, run_method, stream, tools, prompt, expected
+):
+    worker = worker_factory(101, cache_path)
 
     some_list: List[str] = []
     some_errors: List[str] = []
+    function_calls: List[str] = []
+    received = threading.Condition()
 
     def my_handler_1(data: str) -> None:
-        some_list.append(data)
-        print(f'Received data: {data}')
+        with received:
+            some_list.append(data)
+            received.notify_all()
+        if VERBOSE:
+            print(f'Received data: {data}')
 
     def error_handler_1(data: str) -> None:
         some_errors.append(data)
-        print(f'Received data: {data}')
+        if VERBOSE:
+            print(f'Received data: {data}')
 
-    contents = SublimeInputContent(
-        InputKind.ViewSelection, 'This is the test request, provide me 30 words response'
-    )
+    def function_handler_1(name: str, args: str) -> str:
+        function_calls.append(name)
+        return function_handeler(name, args)
 
-    dicttt = {
-        'name': 'TEST',
-        'output_mode': 'phantom',
-        'chat_model': 'gpt-4o-mini',
-        'assistant_role': "You're echo bot. You'r just responsing with what you've been asked for",
-        'url': 'https://api.openai.com/v1/chat/completions',
-        'token': os.getenv('OPENAI_API_KEY'),
-        'stream': True,
-        'advertisement': False,
-    }
+    contents = SublimeInputContent(InputKind.ViewSelection, f'This is the test request, {prompt}')
 
-    settings = AssistantSettings(dicttt)
+    settings = echo_settings.with_overrides(stream=stream, tools=tools, parallel_tool_calls=False)
 
-    worker.run_sync(
+    getattr(worker, run_method)(
         1,
         PromptMode.View,
         [contents],
         settings,
         my_handler_1,
         error_handler_1,
-        function_handeler,
+        function_handler_1,
     )
 
-    time.sleep(2)
+    with received:
+        assert received.wait_for(lambda: ''.join(some_list) == expected, timeout=10), some_list
+    assert not some_errors
+    assert function_calls == (['read_region_content'] if tools else [])
 
-    assert some_list
 
+@pytest.mark.parametrize('stream', [False, True], ids=['plain', 'sse'])
+def test_python_worker_run_collect(worker_factory, cache_path, echo_settings, stream):
+    worker = worker_factory(101, cache_path)
 
-def test_python_worker_sse_function_run():
-    proxy = os.environ.get('PROXY')
-    if proxy is not None:
-        worker = Worker(window_id=101, path=PATH, proxy=proxy)
+    some_errors: List[str] = []
+
+    contents = SublimeInputContent(
+        InputKind.ViewSelection, 'This is the test request, provide me 3 words response'
+    )
+
+    result = worker.run_collect(
+        1,
+        PromptMode.View,
+        [contents],
+        echo_settings.with_overrides(stream=stream),
+        some_errors.append,
+        function_handeler,
+    )
+
+    if stream:
+        assert ''.join(result) == 'This is the test response.'
     else:
-        worker = Worker(window_id=101, path=PATH)
+        assert result == ['Three words response']
+    assert not some_errors
 
-    some_list: List[str] = []
-    some_errors: List[str] = []
 
-    def my_handler_1(data: str) -> None:
-        some_list.append(data)
-        print(f'Received data: {data}')
+def test_python_worker_run_collect_cancel(worker_factory, cache_path, echo_settings, openai_mock_url):
+    worker = worker_factory(101, cache_path)
 
-    def error_handler_1(data: str) -> None:
-        some_errors.append(data)
-        print(f'Received data: {data}')
+    some_errors: List[str] = []
 
     contents = SublimeInputContent(
-        InputKind.ViewSelection,
-        'This is the test request, call the read_region_content function on /tmp/some.txt',
+        InputKind.ViewSelection, 'This is the test request, provide me 30 words response'
     )
 
-    dicttt = {
-        'name': 'TEST',
-        'output_mode': 'phantom',
-        'chat_model': 'gpt-4o-mini',
-        'assistant_role': "You're the function runner bot. You call a function and then prompt response to the user",
-        'url': 'https://api.openai.com/v1/chat/completions',
-        'token': os.getenv('OPENAI_API_KEY'),
-        'tools': True,
-        'parallel_tool_calls': False,
-        'stream': True,
-        'advertisement': False,
-    }
+    settings = echo_settings.with_overrides(
+        url=f'{openai_mock_url}?delay=0.1&fixture=chat_completion_long.sse'
+    )
 
-    settings = AssistantSettings(dicttt)
+    # `run_collect` releases the GIL, so another thread can watch the run and cancel it meanwhile.
+    def cancel_once_alive() -> None:
+        deadline = time.monotonic() + 10
+        while not worker.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        worker.cancel()
 
-    worker.run(1, PromptMode.View, [contents], settings, my_handler_1, error_handler_1, function_handeler)
+    canceller = threading.Thread(target=cancel_once_alive)
+    canceller.start()
+
+    result = worker.run_collect(
+        1, PromptMode.View, [contents], settings, some_errors.append, function_handeler
+    )
 
-    time.sleep(2)
+    canceller.join()
 
-    assert some_list
+    assert result[-1] == '\n[ABORTED]'
+    assert len([chunk for chunk in result[:-1] if chunk]) < 30
+    assert not some_errors
 
 
-@pytest.mark.asyncio
-async def test_python_worker_sse_function_run_cancel():
-    proxy = os.environ.get('PROXY')
-    if proxy is not None:
-        worker = Worker(window_id=101, path=PATH, proxy=proxy)
-    else:
-        worker = Worker(window_id=101, path=PATH)
+def test_python_worker_idle_cancel_does_not_abort_next_run(worker_factory, cache_path, echo_settings):
+    worker = worker_factory(101, cache_path)
+
+    contents = SublimeInputContent(
+        InputKind.ViewSelection, 'This is the test request, provide me 30 words response'
+    )
+
+    some_errors: List[str] = []
+
+    # Nothing is in flight here, so the cancel must not reach the run below.
+    worker.cancel()
+
+    result = worker.run_collect(
+        1, PromptMode.View, [contents], echo_settings, some_errors.append, function_handeler
+    )
+
+    assert ''.join(result) == 'This is the test response.'
+    assert not some_errors
+
+
+async def test_python_worker_sse_function_run_cancel(
+    worker_factory, cache_path, echo_settings, openai_mock_url
+):
+    worker = worker_factory(101, cache_path)
 
     contents = SublimeInputContent(
         InputKind.ViewSelection, 'This is the test request, provide me 30 words response'
@@ -297,40 +372,41 @@ async def test_python_worker_sse_function_run_cancel():
 
     some_list: List[str] = []
     some_errors: List[str] = []
+    received = threading.Condition()
 
     def my_handler_1(data: str) -> None:
-        some_list.append(data)
-        print(f'Received data: {data}')
+        with received:
+            some_list.append(data)
+            received.notify_all()
+        if VERBOSE:
+            print(f'Received data: {data}')
 
     def error_handler_1(data: str) -> None:
         some_errors.append(data)
-        print(f'Received data: {data}')
+        if VERBOSE:
+            print(f'Received data: {data}')
 
-    dicttt = {
-        'name': 'TEST',
-        'output_mode': 'phantom',
-        'chat_model': 'gpt-4o-mini',
-        'assistant_role': "You're echo bot. You'r just responsing with what you've been asked for",
-        'url': 'https://api.openai.com/v1/chat/completions',
-        'token': os.getenv('OPENAI_API_KEY'),
-        'tools': False,
-        'stream': True,
-        'advertisement': False,
-    }
+    def wait_for(predicate) -> bool:
+        with received:
+            return received.wait_for(predicate, timeout=10)
 
-    settings = AssistantSettings(dicttt)
+    # 60 content frames 0.1s apart keep the stream going for ~6s, well past the cancel below.
+    settings = echo_settings.with_overrides(
+        url=f'{openai_mock_url}?delay=0.1&fixture=chat_completion_long.sse'
+    )
 
-    async def run_worker_sync():
-        worker.run(1, PromptMode.View, [contents], settings, my_handler_1, error_handler_1, function_handeler)
+    loop = asyncio.get_running_loop()
 
-    task = asyncio.create_task(run_worker_sync())
+    worker.run(1, PromptMode.View, [contents], settings, my_handler_1, error_handler_1, function_handeler)
 
-    worker.cancel()
+    # The first non-empty chunk means the request is in flight, the rest of the frames are still paced.
+    assert await loop.run_in_executor(None, wait_for, lambda: any(some_list))
 
-    await task
+    worker.cancel()
 
-    await asyncio.sleep(2)
+    assert await loop.run_in_executor(None, wait_for, lambda: '\n[ABORTED]' in some_list)
 
-    with open(f'{PATH}chat_history.jl', 'w') as _:
-        # Opening the file with 'w' mode truncates the file, clearing its contents
-        pass
+    aborted_at = some_list.index('\n[ABORTED]')
+    streamed = [chunk for chunk in some_list[:aborted_at] if chunk]
+    assert streamed
+    assert len(streamed) < 30, 'the cancel should cut the stream off well before its end'